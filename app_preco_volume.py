@@ -1,85 +1,355 @@
 # ──────────────── IMPORTAÇÕES ────────────────
 # Carregamento das bibliotecas essenciais:
+# - datetime/functools: datas nativas e memoização da formatação
 # - os: interação com sistema operacional (variáveis de ambiente)
+# - threading: limita as conexões emprestadas ao tamanho do pool
+# - concurrent.futures: threads para pré-carregamento em segundo plano
+# - numpy: operações vetorizadas sobre arrays (redução de pontos do gráfico)
 # - pandas: manipulação de dados em DataFrames
 # - streamlit: framework para criação de aplicativos web
 # - plotly: biblioteca para criação de gráficos interativos
-# - sqlalchemy: ORM para conexão com banco de dados
+#   (serializado com orjson)
+# - psycopg2: driver PostgreSQL com pool de conexões e composição de SQL
 # - dotenv: carregamento de variáveis de ambiente a partir de arquivo .env
+import datetime
+import functools
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
-from sqlalchemy import create_engine, text
+import psycopg2.pool
+from psycopg2.sql import SQL, Composable, Identifier
 from dotenv import load_dotenv
 
+# ─────────── SERIALIZAÇÃO DO GRÁFICO ───────────
+# orjson gera o JSON da figura enviado ao navegador várias vezes mais rápido
+# que o json da biblioteca padrão
+pio.json.config.default_engine = "orjson"
+
 # ─────────────── CONEXÃO COM O BANCO ─────────
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
-# Cria engine de conexão com PostgreSQL usando URI de conexão
+# Pool de conexões com PostgreSQL compartilhado entre sessões e reruns
 # A URI é obtida da variável de ambiente PGURI (boas práticas de segurança)
-engine = create_engine(os.getenv("PGURI"))
+# e deve estar no formato libpq (postgresql://...), sem "+psycopg2"
+# Threads de pré-carregamento por processo (ver get_executor)
+PREFETCH_WORKERS = 2
+MAX_CONEXOES = 25
+# Conexões mantidas abertas no pool: o psycopg2 fecha na devolução toda
+# conexão além de minconn. Cobre render + pré-carregamento de ~3 sessões
+# simultâneas; acima disso as conexões extras são abertas sob demanda.
+MIN_CONEXOES = 3 * (1 + PREFETCH_WORKERS)
+
+@st.cache_resource
+def get_pool() -> tuple[psycopg2.pool.ThreadedConnectionPool, threading.BoundedSemaphore]:
+    """
+    Cria (uma única vez por processo) o pool de conexões com o banco.
+    As MIN_CONEXOES conexões persistentes evitam o custo de abrir uma
+    conexão nova a cada consulta fora do cache (inclusive quando o render
+    e o pré-carregamento consultam ao mesmo tempo).
+    
+    Retorna:
+        tuple: (pool, vagas) - o semáforo tem uma vaga por conexão do pool
+    """
+    pool = psycopg2.pool.ThreadedConnectionPool(
+        MIN_CONEXOES, MAX_CONEXOES, os.getenv("PGURI")
+    )
+    return pool, threading.BoundedSemaphore(MAX_CONEXOES)
+
+@contextmanager
+def conexao():
+    """
+    Empresta uma conexão do pool e a devolve ao final do bloco `with`
+    (transações pendentes são desfeitas pelo próprio pool na devolução).
+    Com o pool cheio, aguarda uma conexão ser devolvida em vez de falhar
+    com PoolError.
+    """
+    pool, vagas = get_pool()
+    with vagas:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            pool.putconn(conn)
+
+def consulta(sql: str | Composable, params: dict | None = None) -> pd.DataFrame:
+    """
+    Executa uma consulta diretamente pelo psycopg2 e retorna um DataFrame
+    
+    Parâmetros:
+        sql (str | Composable): Consulta SQL (parâmetros no formato %(nome)s)
+        params (dict): Valores dos parâmetros da consulta
+    
+    Retorna:
+        pd.DataFrame: Resultado com as colunas nomeadas pela consulta
+    """
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(sql, params)
+        colunas = [c.name for c in cur.description]
+        # coerce_float converte os Decimal do PostgreSQL (AVG/SUM) para float
+        return pd.DataFrame.from_records(
+            cur.fetchall(), columns=colunas, coerce_float=True
+        )
+
+# Threads de pré-carregamento reaproveitadas entre sessões e reruns
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Cria (uma única vez por processo) o executor usado para aquecer o
+    cache de load_data em segundo plano.
+    """
+    return ThreadPoolExecutor(
+        max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch"
+    )
+
+# ─────────── PARÂMETROS DO GRÁFICO ───────────
+# Acima de LIMIAR_PONTOS registros a série é reduzida para ~PONTOS_ALVO
+# pontos antes de ir para o Plotly (Scattergl fica lento com dezenas de
+# milhares de pontos em eixo de datas)
+LIMIAR_PONTOS = 3_000
+PONTOS_ALVO = 2_500
+# Acima de LIMIAR_INTERACAO registros (antes da redução) o hover passa a
+# ser unificado no eixo X, mais barato que a busca do ponto mais próximo
+LIMIAR_INTERACAO = 5_000
+# Configuração do plotly.js: sem logo e sem ferramentas de seleção
+PLOTLY_CONFIG = {
+    "displaylogo": False,
+    "modeBarButtonsToRemove": [
+        "lasso2d", "select2d", "autoScale2d", "toggleSpikelines"
+    ],
+    "scrollZoom": True,
+    "responsive": True,
+    "doubleClick": "reset",
+}
 
 # ─────────── FUNÇÕES AUXILIARES ───────────
-def formatar_data_ptbr(dt: pd.Timestamp) -> str:
+# Nomes dos meses em português (tupla para acesso escalar, array para
+# indexação vetorizada)
+_MESES = (
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+)
+_MESES_ARR = np.array(_MESES)
+
+@functools.lru_cache(maxsize=1024)
+def _formatar_data(d: datetime.date) -> str:
+    """
+    Formata uma data em 'Dia, Mês, Ano', memoizada pela própria data:
+    título e rodapé repetem as mesmas datas a cada rerun.
     """
-    Formata um objeto Timestamp para o formato 'Dia, Mês, Ano' em português.
+    return f"{d.day}, {_MESES[d.month-1]}, {d.year}"
+
+def formatar_data_ptbr(dt: datetime.date | pd.DatetimeIndex) -> str | np.ndarray:
+    """
+    Formata datas para o formato 'Dia, Mês, Ano' em português.
     Exemplo: 2025-07-16 → "16, Julho, 2025"
     
+    Aceita um escalar (datetime.date, datetime.datetime ou pd.Timestamp,
+    usado direto, sem conversão para pandas) ou uma coleção de datas
+    (DatetimeIndex, Series, lista); coleções são formatadas de forma
+    vetorizada, sem acessar .day/.month/.year elemento a elemento
+    (datas ausentes/NaT viram string vazia).
+    
+    Parâmetros:
+        dt (datetime.date | DatetimeIndex): Data(s) a ser(em) formatada(s)
+    
+    Retorna:
+        str | np.ndarray: Data(s) formatada(s) em português
+    """
+    # Caminho escalar: uma única data (date/datetime/Timestamp)
+    if hasattr(dt, "day") and not hasattr(dt, "__len__"):
+        return _formatar_data(dt)
+    
+    # Caminho vetorizado: concatenação de arrays de strings
+    # NaT é separado antes: com ele, .month vira float e quebra a indexação
+    idx = pd.DatetimeIndex(dt)
+    nat = idx.isna()
+    validas = idx[~nat]
+    dias = validas.day.to_numpy().astype(str)
+    meses = _MESES_ARR[validas.month.to_numpy() - 1]
+    anos = validas.year.to_numpy().astype(str)
+    formatadas = np.char.add(
+        np.char.add(np.char.add(dias, ", "), np.char.add(meses, ", ")), anos
+    )
+    resultado = np.full(len(idx), "", dtype=formatadas.dtype)
+    resultado[~nat] = formatadas
+    return resultado
+
+def indices_lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Seleciona os índices dos pontos de uma série pelo algoritmo LTTB
+    (Largest-Triangle-Three-Buckets), preservando picos e vales visuais.
+    
+    Parâmetros:
+        x (np.ndarray): Eixo X numérico e crescente (ex: datas em ns)
+        y (np.ndarray): Valores da série
+        n_out (int): Quantidade de pontos desejada
+    
+    Retorna:
+        np.ndarray: Índices dos pontos selecionados (em ordem crescente)
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    # Primeiro e último pontos são sempre mantidos; os demais são divididos
+    # em (n_out - 2) baldes. A borda final extra representa o último ponto.
+    bordas = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.int64), n)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    
+    a = 0  # Ponto escolhido no balde anterior
+    for i in range(n_out - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        # Média do próximo balde funciona como terceiro vértice do triângulo
+        cx = x[fim:bordas[i + 2]].mean()
+        cy = y[fim:bordas[i + 2]].mean()
+        # Área (x2) do triângulo formado com cada candidato do balde atual
+        areas = np.abs(
+            (x[a] - cx) * (y[ini:fim] - y[a])
+            - (x[a] - x[ini:fim]) * (cy - y[a])
+        )
+        a = ini + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+def indices_maximo_balde(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Divide a série em n_out baldes e seleciona o índice do maior valor
+    de cada um (usado no volume, onde os picos são o que importa).
+    
+    Parâmetros:
+        y (np.ndarray): Valores da série
+        n_out (int): Quantidade de pontos desejada
+    
+    Retorna:
+        np.ndarray: Índices dos pontos selecionados (em ordem crescente)
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    bordas = np.linspace(0, n, n_out + 1).astype(np.int64)
+    return np.array(
+        [ini + int(np.argmax(y[ini:fim])) for ini, fim in zip(bordas[:-1], bordas[1:])],
+        dtype=np.int64,
+    )
+
+def reduzir_series(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Reduz o DataFrame carregado para o gráfico quando ele passa de
+    LIMIAR_PONTOS registros.
+    
     Parâmetros:
-        dt (pd.Timestamp): Data a ser formatada
+        df (pd.DataFrame): Dados com colunas data_operacao, preco e volume
     
     Retorna:
-        str: Data formatada em português
+        tuple: (df_preco, df_volume) - preço reduzido por LTTB e volume
+               reduzido pelo máximo de cada balde
     """
-    meses = [
-        "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-        "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
-    ]
-    return f"{dt.day}, {meses[dt.month-1]}, {dt.year}"
+    if len(df) <= LIMIAR_PONTOS:
+        return df, df
+    
+    # Datas como inteiros (ns) para o cálculo das áreas do LTTB
+    x = pd.DatetimeIndex(df["data_operacao"]).asi8.astype("float64")
+    preco = df["preco"].to_numpy(dtype="float64")
+    volume = df["volume"].to_numpy(dtype="float64")
+    
+    df_preco = df.iloc[indices_lttb(x, preco, PONTOS_ALVO)]
+    df_volume = df.iloc[indices_maximo_balde(volume, PONTOS_ALVO)]
+    return df_preco, df_volume
 
 # ─────────── FUNÇÕES CACHEADAS (OTIMIZADAS) ───────────
 # Cache de 24 horas para evitar consultas repetidas ao banco
-@st.cache_data(ttl=86_400)
+# (cache_resource: a lista é só lida, então dispensa a cópia a cada acesso)
+@st.cache_resource(ttl=86_400)
 def lista_tickers() -> list[str]:
     """
     Retorna lista de tickers principais (sem sufixos) formatados como:
     [PETR4, VALE3, ITUB4, ...]
     
     Técnica:
-    - Usa regex para extrair o padrão básico de ticker (4 letras + 1 dígito)
-    - Remove duplicatas e valores nulos
+    - Lê a visão materializada tickers_clean (ver sql/otimizacoes.sql),
+      que já guarda os tickers extraídos por regex (4 letras + 1 dígito),
+      sem duplicatas
+    - Remove valores nulos
     - Ordena alfabeticamente
+    - Monta a lista direto do cursor, sem DataFrame intermediário
     """
     sql = """
-        SELECT DISTINCT 
-            -- Extrai apenas a parte principal do ticker (ex: PETR4 de PETR4F)
-            (REGEXP_MATCH(codneg, '^([A-Z]{4}\d{1})'))[1] AS ticker_clean
-        FROM cotahist_hist 
-        -- Filtra apenas tickers que começam com 4 letras e 1 dígito
-        WHERE codneg ~ '^[A-Z]{4}\d'  
-        ORDER BY ticker_clean
+        SELECT ticker
+        FROM tickers_clean
+        WHERE ticker IS NOT NULL
+        ORDER BY ticker
     """
-    # Executa consulta SQL e retorna como DataFrame
-    df = pd.read_sql(sql, engine)
-    
-    # Remove valores nulos e retorna lista única de tickers
-    return df['ticker_clean'].dropna().unique().tolist()
+    with conexao() as conn, conn.cursor() as cur:
+        cur.execute(sql)
+        return [linha[0] for linha in cur.fetchall()]
 
 @st.cache_data(ttl=86_400)
 def get_date_bounds() -> tuple:
     """
     Retorna as datas mínima e máxima disponíveis no banco
     (Cache de 24h para evitar consultas repetidas)
+    
+    Lê a tabela de uma linha cotahist_meta, atualizada ao final de cada
+    carga (ver sql/refresh_noturno.sql), em vez de MIN/MAX na tabela fato.
+    Se a linha ainda não existe ou está vazia (antes da primeira carga),
+    recorre ao MIN/MAX direto na tabela fato.
     """
-    result = pd.read_sql(
-        "SELECT MIN(data_operacao) AS min, MAX(data_operacao) AS max FROM cotahist_hist",
-        engine
-    ).iloc[0]  # Pega primeira linha do resultado
+    meta = consulta("SELECT min_dt AS min, max_dt AS max FROM cotahist_meta")
+    if meta.empty or meta.iloc[0].isna().any():
+        meta = consulta(
+            "SELECT MIN(data_operacao) AS min, MAX(data_operacao) AS max FROM cotahist_hist"
+        )
+    result = meta.iloc[0]  # Pega primeira linha do resultado
     return result["min"], result["max"]
 
+# Nome exibido de cada código de frequência (usado no título do gráfico)
+NOMES_FREQ = {"D": "Diária", "W": "Semanal", "M": "Mensal"}
+
+# Visões materializadas com as agregações semanal e mensal já calculadas
+# (ver sql/otimizacoes.sql): código da frequência → (visão, unidade)
+# A frequência diária continua lendo a tabela base
+ROLLUPS = {
+    "W": ("cotahist_weekly", "week"),
+    "M": ("cotahist_monthly", "month"),
+}
+
+def limites_efetivos(ini, fim, freq_code: str) -> tuple:
+    """
+    Retorna o intervalo de datas realmente coberto pelos dados de load_data
+    
+    Nas frequências semanal/mensal os períodos das bordas vêm completos das
+    visões materializadas, então o intervalo vai do início da primeira
+    semana/mês (semanas começam na segunda, como no PostgreSQL) ao fim da
+    última.
+    
+    Parâmetros:
+        ini: Data inicial selecionada (datetime.date)
+        fim: Data final selecionada (datetime.date)
+        freq_code (str): Código da frequência ('D', 'W', 'M')
+    
+    Retorna:
+        tuple: (ini_efetivo, fim_efetivo)
+    """
+    if freq_code == "W":
+        return (
+            ini - datetime.timedelta(days=ini.weekday()),
+            fim + datetime.timedelta(days=6 - fim.weekday()),
+        )
+    if freq_code == "M":
+        # Último dia do mês: vai para o mês seguinte e volta um dia
+        proximo_mes = (fim.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        return ini.replace(day=1), proximo_mes - datetime.timedelta(days=1)
+    return ini, fim
+
 @st.cache_data(ttl=3_600, show_spinner=False)
 def load_data(t: str, ini, fim, freq: str = 'D') -> pd.DataFrame:
     """
@@ -92,33 +362,149 @@ def load_data(t: str, ini, fim, freq: str = 'D') -> pd.DataFrame:
         freq (str): Frequência de agregação ('D', 'W', 'M')
     
     Técnicas:
-    - Agregação direta no banco usando DATE_TRUNC
+    - Semanal/mensal lidos das visões materializadas (O(semanas/meses)
+      linhas); períodos parciais nas bordas trazem o período completo
+    - Diária agrupada direto pela coluna de data (já é a granularidade
+      do pregão), sem DATE_TRUNC por linha
+    - Intervalo semiaberto [ini, fim + 1 dia) comparando date com date,
+      o que mantém o índice (codneg, data) utilizável
     - Uso de prepared statements para segurança
     - Cache de 1 hora para consultas repetidas
     """
-    # Query SQL com agregação temporal
-    sql = text(f"""
-        SELECT 
-            DATE_TRUNC('{freq}', data_operacao) AS data_agregada,
-            AVG(preco_fechamento) AS preco,
-            SUM(volume) AS volume
-        FROM cotahist_hist
-        WHERE codneg = :t
-          AND data_operacao BETWEEN :ini AND :fim
-        GROUP BY data_agregada
-        ORDER BY data_agregada
-    """)
+    params = {"t": t, "ini": ini, "fim": fim}
+    if freq in ROLLUPS:
+        # Query SQL sobre a agregação pré-calculada: a unidade vai como
+        # parâmetro e o nome da visão como identificador escapado, então o
+        # texto da consulta é fixo por visão (sem f-string com valores)
+        visao, params["unidade"] = ROLLUPS[freq]
+        sql = SQL("""
+            SELECT data_agregada, preco, volume
+            FROM {visao}
+            WHERE codneg = %(t)s
+              AND data_agregada >= DATE_TRUNC(%(unidade)s, %(ini)s::date)::date
+              AND data_agregada < %(fim)s::date + 1
+            ORDER BY data_agregada
+        """).format(visao=Identifier(visao))
+    else:
+        # Query SQL com agregação diária
+        sql = """
+            SELECT 
+                data_operacao AS data_agregada,
+                AVG(preco_fechamento) AS preco,
+                SUM(volume) AS volume
+            FROM cotahist_hist
+            WHERE codneg = %(t)s
+              AND data_operacao >= %(ini)s::date
+              AND data_operacao < %(fim)s::date + 1
+            GROUP BY data_agregada
+            ORDER BY data_agregada
+        """
     
     # Executa consulta com parâmetros seguros
-    df = pd.read_sql(
-        sql, 
-        engine,
-        params={"t": t, "ini": ini, "fim": fim},
-        parse_dates=["data_agregada"]  # Converte para datetime
-    )
+    df = consulta(sql, params)
+    # Tipos explícitos por coluna: float64 para os dois (float32 só é exato
+    # em centavos até ~R$167 mil); volume mantém os centavos, com SUM nulo
+    # (sem negócios) tratado como zero
+    df["volume"] = df["volume"].fillna(0)
+    df = df.astype({"preco": "float64", "volume": "float64"})
+    # Converte para datetime (cache reaproveita datas repetidas)
+    df["data_agregada"] = pd.to_datetime(df["data_agregada"], cache=True)
     # Padroniza nome da coluna de data
     return df.rename(columns={"data_agregada": "data_operacao"})
 
+# Limite de figuras em cache: cada uma fica inteira na memória do processo
+@st.cache_resource(ttl=3_600, max_entries=64, show_spinner=False)
+def build_figure(t: str, ini, fim, freq_code: str) -> go.Figure:
+    """
+    Monta a figura completa (preço + volume) para os filtros informados
+    
+    Parâmetros:
+        t (str): Ticker do ativo
+        ini: Data inicial (datetime.date)
+        fim: Data final (datetime.date)
+        freq_code (str): Código da frequência para o banco ('D', 'W', 'M')
+    
+    Técnicas:
+    - Cache de recurso: a figura é montada uma vez e reaproveitada em
+      reruns que não alteram os filtros (sem cópia a cada acesso),
+      limitado às 64 figuras mais recentes
+    - Dados vêm de load_data, que também é cacheada
+    """
+    df = load_data(t, ini, fim, freq_code)
+    
+    # Formata datas para o título usando função auxiliar, com o intervalo
+    # efetivamente coberto (semanas/meses completos nas bordas)
+    ini_titulo, fim_titulo = limites_efetivos(ini, fim, freq_code)
+    titulo_formatado = (
+        f"{t} | {NOMES_FREQ[freq_code]} | "
+        f"{formatar_data_ptbr(ini_titulo)} - "
+        f"{formatar_data_ptbr(fim_titulo)}"
+    )
+    
+    # Reduz a quantidade de pontos enviados ao navegador em séries longas
+    df_preco, df_volume = reduzir_series(df)
+    # Séries longas: hover enxuto para manter pan/zoom fluidos
+    serie_longa = len(df) > LIMIAR_INTERACAO
+    
+    # Cria figura com eixo secundário para volume
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    
+    # Gráfico de linha para preços (usando WebGL para performance)
+    # Listas Python simples evitam a validação elemento a elemento que o
+    # plotly faz sobre Series do pandas e não viram typed arrays (bdata)
+    # no plotly >= 6, que deixam o plotly.js mais lento; datas vão como
+    # texto ISO. Preço arredondado em centavos: as médias semanais/mensais
+    # têm muitas casas decimais, que só aumentariam o JSON
+    fig.add_trace(
+        go.Scattergl(
+            x=df_preco["data_operacao"].dt.strftime("%Y-%m-%d").tolist(),
+            y=df_preco["preco"].to_numpy().round(2).tolist(),
+            name="Preço (R$)",
+            line=dict(color="#1f77b4"),  # Cor consistente
+            hovertemplate="%{y:.2f}<extra></extra>" if serie_longa else None,
+        ),
+        secondary_y=False,  # Eixo primário
+    )
+    
+    # Barras para volume (inicialmente ocultas)
+    fig.add_trace(
+        go.Bar(
+            x=df_volume["data_operacao"].dt.strftime("%Y-%m-%d").tolist(),
+            y=df_volume["volume"].tolist(),
+            name="Volume",
+            marker_color="lightgray",  # Cor neutra
+            opacity=0.4,  # Transparência
+            visible="legendonly",  # Oculta inicialmente
+            hoverinfo="skip" if serie_longa else None,
+        ),
+        secondary_y=True,  # Eixo secundário
+    )
+    
+    # Configuração do layout
+    fig.update_layout(
+        title=titulo_formatado,  # Título com datas formatadas
+        xaxis_title="Data",
+        yaxis_title="Preço (R$)",  # Eixo primário
+        yaxis2_title="Volume",     # Eixo secundário
+        legend=dict(
+            orientation="h",  # Horizontal
+            yanchor="bottom", 
+            y=1.02  # Posição acima do gráfico
+        ),
+        template="plotly_white",  # Tema claro
+        height=600,  # Altura fixa para melhor responsividade
+        hovermode="x unified" if serie_longa else "closest",
+        # Mantém zoom/pan do usuário entre reruns com os mesmos filtros
+        uirevision="|".join((t, str(ini), str(fim), freq_code)),
+        transition_duration=0,  # Sem animações de transição
+        dragmode="pan",  # Arrastar move o gráfico (mais leve que zoom por caixa)
+    )
+    
+    # Garante que o eixo de volume comece em zero
+    fig.update_yaxes(rangemode="tozero", secondary_y=True)
+    
+    return fig
+
 # ─────────── INTERFACE PRINCIPAL ─────────────
 # Configuração da barra lateral (sidebar)
 st.sidebar.title("Filtros")
@@ -144,7 +530,7 @@ freq = st.sidebar.radio(
     horizontal=True  # Layout otimizado para mobile
 )
 # Mapeamento das frequências para valores do PostgreSQL
-freq_map = {"Diária": "D", "Semanal": "W", "Mensal": "M"}
+freq_map = {nome: codigo for codigo, nome in NOMES_FREQ.items()}
 
 # Seletor de intervalo de datas
 data_ini, data_fim = st.sidebar.date_input(
@@ -163,70 +549,43 @@ chart_placeholder = st.empty()
 with st.spinner(f"Carregando dados para {ticker}..."):
     # Carrega dados com agregação otimizada
     df = load_data(ticker, data_ini, data_fim, freq_map[freq])
-    
-    # Feedback visual de conclusão
-    st.toast(f"✅ {len(df)} registros carregados", icon="⚡")
+
+# Rodapé com data de atualização formatada
+# (montado antes do gráfico para aparecer também quando não há dados)
+atualizacao_formatada = formatar_data_ptbr(datetime.date.today())
+rodape = f"Fonte: Banco de dados | Atualizado em {atualizacao_formatada}"
+
+# Sem dados (ticker/período sem pregões): não há gráfico a montar
+if df.empty:
+    st.info(f"Sem dados para {ticker} no período.")
+    st.caption(rodape)
+    st.stop()
+
+# Feedback visual de conclusão
+st.toast(f"✅ {len(df)} registros carregados", icon="⚡")
+
+# ─────────── PRÉ-CARREGAMENTO ───────────
+# Usuários costumam alternar entre as três frequências: carrega as outras
+# duas em segundo plano para que o cache de load_data já esteja pronto.
+# A flag de sessão garante um único disparo por ticker/período.
+chave_prefetch = (ticker, data_ini, data_fim)
+if st.session_state.get("prefetch") != chave_prefetch:
+    st.session_state["prefetch"] = chave_prefetch
+    for outra_freq in freq_map.values():
+        if outra_freq != freq_map[freq]:
+            get_executor().submit(load_data, ticker, data_ini, data_fim, outra_freq)
 
 # ─────────── CONSTRUÇÃO DO GRÁFICO ───────────
 with chart_placeholder.container():
-    # Formata datas para o título usando função auxiliar
-    titulo_formatado = (
-        f"{ticker} | {freq} | "
-        f"{formatar_data_ptbr(pd.Timestamp(data_ini))} - "
-        f"{formatar_data_ptbr(pd.Timestamp(data_fim))}"
-    )
-    
-    # Cria figura com eixo secundário para volume
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-    
-    # Gráfico de linha para preços (usando WebGL para performance)
-    fig.add_trace(
-        go.Scattergl(
-            x=df["data_operacao"],
-            y=df["preco"],
-            name="Preço (R$)",
-            line=dict(color="#1f77b4")  # Cor consistente
-        ),
-        secondary_y=False,  # Eixo primário
-    )
-    
-    # Barras para volume (inicialmente ocultas)
-    fig.add_trace(
-        go.Bar(
-            x=df["data_operacao"],
-            y=df["volume"],
-            name="Volume",
-            marker_color="lightgray",  # Cor neutra
-            opacity=0.4,  # Transparência
-            visible="legendonly",  # Oculta inicialmente
-        ),
-        secondary_y=True,  # Eixo secundário
-    )
-    
-    # Configuração do layout
-    fig.update_layout(
-        title=titulo_formatado,  # Título com datas formatadas
-        xaxis_title="Data",
-        yaxis_title="Preço (R$)",  # Eixo primário
-        yaxis2_title="Volume",     # Eixo secundário
-        legend=dict(
-            orientation="h",  # Horizontal
-            yanchor="bottom", 
-            y=1.02  # Posição acima do gráfico
-        ),
-        template="plotly_white",  # Tema claro
-        height=600  # Altura fixa para melhor responsividade
-    )
-    
-    # Garante que o eixo de volume comece em zero
-    fig.update_yaxes(rangemode="tozero", secondary_y=True)
+    # Figura montada (ou recuperada do cache) com os filtros atuais
+    fig = build_figure(ticker, data_ini, data_fim, freq_map[freq])
     
-    # Exibe gráfico usando toda largura disponível
-    st.plotly_chart(fig, use_container_width=True)
+    # Exibe gráfico usando toda largura disponível, com barra de ferramentas
+    # enxuta (menos botões para o plotly.js montar e recalcular)
+    st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
 
 # Rodapé com data de atualização formatada
-atualizacao_formatada = formatar_data_ptbr(pd.Timestamp.now())
-st.caption(f"Fonte: Banco de dados | Atualizado em {atualizacao_formatada}")
+st.caption(rodape)
 
 
 
@@ -0,0 +1,66 @@
+-- ──────────────── OTIMIZAÇÕES DO BANCO ────────────────
+-- Índices e visões materializadas usados pelo dashboard (app_preco_volume.py).
+-- Execute uma vez após a carga inicial do ETL:
+--   psql "$PGURI" -f sql/otimizacoes.sql
+
+-- ─────────── ÍNDICE DE COBERTURA ───────────
+-- Consultas do dashboard filtram por ticker + intervalo de datas e leem apenas
+-- preço de fechamento e volume: o INCLUDE permite index-only scan
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cotahist_codneg_data
+    ON cotahist_hist (codneg, data_operacao)
+    INCLUDE (preco_fechamento, volume);
+
+-- ─────────── AGREGAÇÕES PRÉ-CALCULADAS ───────────
+-- Frequências semanal e mensal leem O(semanas/meses) linhas em vez de O(dias)
+CREATE MATERIALIZED VIEW IF NOT EXISTS cotahist_weekly AS
+    SELECT
+        codneg,
+        DATE_TRUNC('week', data_operacao)::date AS data_agregada,
+        AVG(preco_fechamento) AS preco,
+        SUM(volume) AS volume
+    FROM cotahist_hist
+    GROUP BY 1, 2;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS cotahist_monthly AS
+    SELECT
+        codneg,
+        DATE_TRUNC('month', data_operacao)::date AS data_agregada,
+        AVG(preco_fechamento) AS preco,
+        SUM(volume) AS volume
+    FROM cotahist_hist
+    GROUP BY 1, 2;
+
+-- Índices únicos: atendem o filtro do dashboard e são exigidos pelo
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS ux_cotahist_weekly
+    ON cotahist_weekly (codneg, data_agregada);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_cotahist_monthly
+    ON cotahist_monthly (codneg, data_agregada);
+
+-- ─────────── LISTA DE TICKERS ───────────
+-- Ticker principal (ex: PETR4 de PETR4F) extraído uma única vez por carga,
+-- em vez de aplicar a regex em todas as linhas a cada consulta do dashboard
+CREATE MATERIALIZED VIEW IF NOT EXISTS tickers_clean AS
+    SELECT DISTINCT (REGEXP_MATCH(codneg, '^([A-Z]{4}\d)'))[1] AS ticker
+    FROM cotahist_hist
+    -- Filtra apenas tickers que começam com 4 letras e 1 dígito
+    WHERE codneg ~ '^[A-Z]{4}\d'
+    ORDER BY 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_tickers_clean
+    ON tickers_clean (ticker);
+
+-- ─────────── METADADOS DA CARGA ───────────
+-- Limites de datas disponíveis (uma única linha), lidos pelo dashboard em
+-- tempo constante em vez de MIN/MAX sobre a tabela fato
+-- A chave booleana com CHECK garante no máximo uma linha na tabela
+CREATE TABLE IF NOT EXISTS cotahist_meta (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    min_dt date,
+    max_dt date
+);
+
+INSERT INTO cotahist_meta (min_dt, max_dt)
+    SELECT MIN(data_operacao), MAX(data_operacao)
+    FROM cotahist_hist
+    ON CONFLICT (id) DO NOTHING;
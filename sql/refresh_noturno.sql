@@ -0,0 +1,14 @@
+-- ──────────────── ATUALIZAÇÃO NOTURNA ────────────────
+-- Executar ao final de cada carga do ETL para refletir os novos pregões:
+--   psql "$PGURI" -f sql/refresh_noturno.sql
+-- CONCURRENTLY não bloqueia as leituras do dashboard durante a atualização
+
+REFRESH MATERIALIZED VIEW CONCURRENTLY cotahist_weekly;
+REFRESH MATERIALIZED VIEW CONCURRENTLY cotahist_monthly;
+REFRESH MATERIALIZED VIEW CONCURRENTLY tickers_clean;
+
+-- Limites de datas lidos pelo dashboard (tabela de uma linha)
+INSERT INTO cotahist_meta (min_dt, max_dt)
+    SELECT MIN(data_operacao), MAX(data_operacao) FROM cotahist_hist
+    ON CONFLICT (id) DO UPDATE
+        SET min_dt = EXCLUDED.min_dt, max_dt = EXCLUDED.max_dt;